@@ -1,14 +1,30 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import gspread
-from google.oauth2.service_account import Credentials
+from datetime import date, datetime
+import argparse
 import json
 import os
+import sys
 import warnings
+import busqueda
+import calculos
+import snapshots
+from calculos import standardize_df
 warnings.filterwarnings("ignore")
 
+
+def parse_cli_args(argv):
+    """Flags propios de la app: ``streamlit run app.py -- --as-of AAAA-MM-DD [--visor]``."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--as-of", dest="as_of", default=None)
+    parser.add_argument("--visor", action="store_true")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+CLI_ARGS = parse_cli_args(sys.argv[1:])
+
 # ─────────────────────────────────────────────
 # PAGE CONFIG & UFINET BRAND STYLES
 # ─────────────────────────────────────────────
@@ -168,12 +184,92 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# ─────────────────────────────────────────────
+# VISOR DE SOLO LECTURA (SNAPSHOTS)
+# ─────────────────────────────────────────────
+COLUMNAS_VISOR = {
+    "servicio": "Servicio",
+    "cliente": "Cliente",
+    "motivo": "Criterio Reincidencia",
+    "incidentes_mes": "Incidentes Mes",
+    "incidentes_30d": "Incidentes Últimos 30d",
+    "incidentes_trimestre": "Incidentes Últimos 90d",
+    "mes": "Mes",
+    "nivel_sla": "Nivel SLA",
+    "consumo_sla": "Consumo SLA (%)",
+    "downtime_acum": "Downtime Acum. (min)",
+    "downtime_permitido": "Downtime Permitido (min)",
+    "n_tickets": "# Tickets",
+}
+
+TITULOS_VISOR = {
+    "reincidencias": "🔁 Reincidencias (Punto 2)",
+    "mtbf": "⏱️ MTBF (Punto 3)",
+    "disponibilidad": "📶 Disponibilidad (Puntos 4-5)",
+    "alertas": "📊 Alertas Diarias (Punto 1)",
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cargar_snapshot(ruta: str):
+    return snapshots.cargar_snapshot(ruta)
+
+
+def mostrar_visor():
+    """Muestra el último snapshot publicado, sin cargar datos ni recalcular."""
+    ruta = snapshots.ultimo_snapshot()
+    if ruta is None:
+        st.info(
+            "👀 Modo visor: aún no hay snapshots publicados. Carga los datos en la app completa "
+            "y usa **💾 Publicar snapshot** en el panel lateral.",
+            icon="ℹ️",
+        )
+        return
+
+    manifest, tablas = cargar_snapshot(ruta)
+    as_of_snap = datetime.fromisoformat(manifest["as_of"])
+    st.caption(
+        f"👀 Modo visor · corte **{as_of_snap.strftime('%d/%m/%Y')}** · "
+        f"generado {datetime.fromisoformat(manifest['creado']).strftime('%d/%m/%Y %H:%M')} · `{os.path.basename(ruta)}`"
+    )
+
+    kpis = manifest["kpis"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("🎫 Total Tickets", f"{kpis['total_tickets']:,}")
+    col2.metric("📅 Tickets Mes de Corte", f"{kpis['total_mes']:,}")
+    col3.metric("🔗 Servicios Únicos", f"{kpis['servicios_uniq']:,}")
+    col4.metric("🏢 Clientes", f"{kpis['clientes_uniq']:,}")
+    st.markdown("---")
+
+    nombres = [n for n in snapshots.TABLAS if n in tablas]
+    for tab, nombre in zip(st.tabs([TITULOS_VISOR[n] for n in nombres]), nombres):
+        with tab:
+            tabla = tablas[nombre]
+            st.markdown(f"**{len(tabla):,}** filas")
+            st.dataframe(tabla.rename(columns=COLUMNAS_VISOR), use_container_width=True, height=500)
+            st.download_button(
+                "⬇️ Exportar CSV",
+                tabla.to_csv(index=False).encode("utf-8"),
+                f"{nombre}_ufinet_{as_of_snap:%Y%m%d}.csv",
+                "text/csv",
+                key=f"visor_{nombre}",
+            )
+
+
+if CLI_ARGS.visor or st.query_params.get("modo") == "visor":
+    mostrar_visor()
+    st.stop()
+
 # ─────────────────────────────────────────────
 # DATA LOADING
 # ─────────────────────────────────────────────
 @st.cache_data(ttl=300)
 def load_from_gsheet(sheet_url: str, sheet_name: str = None):
     """Load data from Google Sheets using service account credentials stored in st.secrets."""
+    # Import diferido: el stack de Google solo se carga cuando se conecta a Sheets
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     try:
         creds_dict = dict(st.secrets["gcp_service_account"])
 
@@ -216,18 +312,7 @@ def load_from_gsheet(sheet_url: str, sheet_name: str = None):
         rows = all_values[1:]
 
         # Limpiar headers duplicados o vacíos
-        seen = {}
-        clean_headers = []
-        for h in headers:
-            h = h.strip() if h else "sin_nombre"
-            if h in seen:
-                seen[h] += 1
-                h = f"{h}_{seen[h]}"
-            else:
-                seen[h] = 0
-            clean_headers.append(h)
-
-        df = pd.DataFrame(rows, columns=clean_headers)
+        df = pd.DataFrame(rows, columns=calculos.limpiar_encabezados(headers))
 
         # Eliminar filas completamente vacías
         df = df.replace("", pd.NA).dropna(how="all").reset_index(drop=True)
@@ -266,42 +351,63 @@ def load_from_upload(uploaded_file):
     """Load data from uploaded Excel file."""
     try:
         df = pd.read_excel(uploaded_file, engine="openpyxl")
+        df.columns = calculos.limpiar_encabezados(df.columns)
         return df, None
     except Exception as e:
         return None, str(e)
 
 
-def standardize_df(df: pd.DataFrame) -> pd.DataFrame:
-    """Rename columns to standard internal names."""
-    col_map = {
-        "Id de Ticket": "ticket_id",
-        "Fecha y Hora de creación": "fecha_creacion",
-        "Fecha de restablecimiento del servicio": "fecha_restablecimiento",
-        "Fecha estado resuelto": "fecha_resuelto",
-        "Cliente Customer": "cliente",
-        "Servicio afectado": "servicio",
-        "País Origen": "pais",
-        "Prioridad": "prioridad",
-        "Tiempo imputable a Ufinet": "tiempo_ufinet_min",
-        "Capacidad (Mpbs)": "capacidad",
-        "Título de la Incidencia": "titulo",
-        "Tipo de Incidencia": "tipo_incidencia",
-        "Imputable a": "imputable",
-        "Código administrativo": "codigo_admin",
-        "Cliente Final (Servicio afectado) (Servicios contratados)": "cliente_final",
-    }
-    df = df.rename(columns={k: v for k, v in col_map.items() if k in df.columns})
+@st.cache_resource(show_spinner="Procesando datos...", max_entries=2)
+def preparar_datos(_df_raw, df_version, opciones):
+    """standardize_df + validar_df una sola vez por versión de datos y opciones de parseo.
 
-    # Parse dates
-    for col in ["fecha_creacion", "fecha_restablecimiento", "fecha_resuelto"]:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce")
+    cache_resource evita copiar el DataFrame en cada rerun; el resultado se
+    trata como solo lectura (los filtros trabajan sobre copias).
+    """
+    unidad_tiempo, formatos_fecha, dayfirst = opciones
+    return calculos.validar_df(standardize_df(_df_raw.copy(), unidad_tiempo, formatos_fecha, dayfirst))
 
-    # Numeric
-    if "tiempo_ufinet_min" in df.columns:
-        df["tiempo_ufinet_min"] = pd.to_numeric(df["tiempo_ufinet_min"], errors="coerce").fillna(0)
 
-    return df
+@st.cache_resource(show_spinner=False, max_entries=2)
+def indice_busqueda(_df, df_version, opciones):
+    """Índice de servicios/clientes, construido una vez por versión de datos."""
+    return busqueda.IndiceBusqueda(_df)
+
+
+# ─────────────────────────────────────────────
+# REPORTES CACHEADOS POR (VERSIÓN DE DATOS, FECHA DE CORTE)
+# ─────────────────────────────────────────────
+# El DataFrame va con "_" para que Streamlit no lo hashee en cada rerun; la
+# clave de caché es `version` (contenido + filtros) y `as_of`. Recorrer fechas
+# pasadas ya calculadas es instantáneo.
+@st.cache_data(show_spinner=False, max_entries=400)
+def reporte_kpis(_df, version, as_of):
+    return calculos.calcular_kpis(_df, as_of)
+
+
+@st.cache_data(show_spinner=False, max_entries=400)
+def reporte_reincidencias(_df, version, as_of):
+    return calculos.calcular_reincidencias(_df, as_of)
+
+
+@st.cache_data(show_spinner=False, max_entries=400)
+def reporte_mtbf(_df, version, as_of, dias=30):
+    return calculos.calcular_mtbf(_df, as_of, dias)
+
+
+@st.cache_data(show_spinner=False, max_entries=400)
+def reporte_disponibilidad(_df, version, as_of, sla_objetivo):
+    return calculos.calcular_disponibilidad(_df, as_of, sla_objetivo)
+
+
+@st.cache_data(show_spinner=False, max_entries=400)
+def reporte_sla_mensual(_df, version, as_of, sla_objetivo):
+    return calculos.calcular_sla_mensual(calculos.hasta_corte(_df, as_of), sla_objetivo)
+
+
+@st.cache_data(show_spinner=False, max_entries=400)
+def reporte_alertas(_df, version, as_of):
+    return calculos.calcular_alertas(_df, as_of)
 
 
 # ─────────────────────────────────────────────
@@ -313,6 +419,8 @@ if "load_error" not in st.session_state:
     st.session_state.load_error = None
 if "sheet_url_loaded" not in st.session_state:
     st.session_state.sheet_url_loaded = ""
+if "df_version" not in st.session_state:
+    st.session_state.df_version = None
 
 # ─────────────────────────────────────────────
 # SIDEBAR – DATA SOURCE
@@ -349,6 +457,7 @@ with st.sidebar:
                 st.session_state.df_raw = None
                 st.session_state.load_error = None
                 st.session_state.sheet_url_loaded = ""
+                st.session_state.df_version = None
                 st.rerun()
 
         if cargar:
@@ -364,6 +473,7 @@ with st.sidebar:
                     st.session_state.df_raw = None
                 elif df_tmp is not None and not df_tmp.empty:
                     st.session_state.df_raw = df_tmp
+                    st.session_state.df_version = calculos.version_dataset(df_tmp)
                     st.session_state.load_error = None
                     st.session_state.sheet_url_loaded = sheet_url
                     st.success(f"✅ {len(df_tmp):,} filas cargadas")
@@ -391,10 +501,39 @@ with st.sidebar:
             else:
                 st.session_state.df_raw = df_tmp
                 st.session_state.load_error = None
+                # Hashear el contenido solo cuando cambia el archivo, no en cada rerun
+                if st.session_state.get("upload_id") != uploaded.file_id:
+                    st.session_state.upload_id = uploaded.file_id
+                    st.session_state.df_version = calculos.version_dataset(df_tmp)
         # Clear gsheet state when switching to Excel
         if st.session_state.sheet_url_loaded:
             st.session_state.sheet_url_loaded = ""
 
+    with st.expander("🔧 Parámetros de cálculo"):
+        unidad_tiempo = st.selectbox(
+            "Unidad de 'Tiempo imputable a Ufinet'",
+            list(calculos.UNIDADES_TIEMPO),
+            format_func=calculos.UNIDADES_TIEMPO.get,
+            help="En automático se asume segundos si, entre los tiempos mayores que 0, la mediana supera "
+                 "10.000 o el percentil 95 supera los minutos de un mes de 31 días (44.640).",
+        )
+        sla_objetivo = st.number_input(
+            "Objetivo SLA mensual (%)",
+            min_value=90.0,
+            max_value=99.999,
+            value=calculos.SLA_OBJETIVO,
+            step=0.05,
+            format="%.3f",
+        )
+        formato_fecha = st.text_input(
+            "Formato de fecha (opcional)",
+            "",
+            placeholder="%d/%m/%Y %H:%M:%S",
+            help="Formato exacto de las columnas de fecha (sintaxis strftime). Se prueba antes que los "
+                 "formatos habituales; lo que no encaje se interpreta automáticamente.",
+        )
+        dayfirst = st.checkbox("Día antes que mes (dd/mm)", value=True)
+
     st.markdown("---")
     st.markdown("### 🗓️ Filtros globales")
 
@@ -404,6 +543,14 @@ with st.sidebar:
     filter_fecha_start = None
     filter_fecha_end = None
 
+# Fecha de corte por defecto: flag --as-of o el día de hoy
+as_of_default = date.today()
+if CLI_ARGS.as_of:
+    try:
+        as_of_default = date.fromisoformat(CLI_ARGS.as_of)
+    except ValueError:
+        st.sidebar.warning(f"⚠️ --as-of inválido ({CLI_ARGS.as_of}), se usa la fecha de hoy.")
+
 # Read from session state
 df_raw = st.session_state.df_raw
 load_error = st.session_state.load_error
@@ -424,7 +571,14 @@ if not isinstance(df_raw, pd.DataFrame) or df_raw.empty:
     st.warning("⚠️ El archivo cargado está vacío o no tiene el formato esperado.")
     st.stop()
 
-df = standardize_df(df_raw.copy())
+formatos_fecha = calculos.FORMATOS_FECHA
+if formato_fecha.strip():
+    formatos_fecha = (formato_fecha.strip(),) + formatos_fecha
+opciones_std = (unidad_tiempo, formatos_fecha, dayfirst)
+
+if st.session_state.df_version is None:
+    st.session_state.df_version = calculos.version_dataset(df_raw)
+df = preparar_datos(df_raw, st.session_state.df_version, opciones_std)
 
 # ─────────────────────────────────────────────
 # SIDEBAR FILTERS (after data is loaded)
@@ -444,6 +598,34 @@ with st.sidebar:
         filter_fecha_start = st.date_input("Desde", value=min_d)
         filter_fecha_end = st.date_input("Hasta", value=max_d)
 
+    as_of_dia = st.date_input(
+        "📆 Fecha de corte",
+        value=as_of_default,
+        help="Reconstruye los reportes tal como se veían al final de este día. "
+             "También se puede fijar al arrancar: streamlit run app.py -- --as-of AAAA-MM-DD",
+    )
+
+    validacion = df.attrs.get("validacion", {})
+    n_anomalias = sum(v for k, v in validacion.items() if k not in ("filas", "fecha_nat_pct"))
+    with st.expander(f"🩺 Diagnóstico de datos{' ⚠️' if n_anomalias else ''}"):
+        st.markdown(f"**Filas cargadas:** {validacion.get('filas', len(df)):,} · **en análisis:** {len(df):,}")
+        if df.attrs.get("unidad_tiempo"):
+            st.markdown(f"**Unidad de tiempo:** {calculos.UNIDADES_TIEMPO[df.attrs['unidad_tiempo']]}")
+        for col, n_nat in df.attrs.get("fechas_nat", {}).items():
+            st.markdown(f"**{col}:** {n_nat:,} valores no interpretables → NaT")
+        if "duplicados" in validacion:
+            st.markdown(f"**Tickets duplicados eliminados:** {validacion['duplicados']:,}")
+        if "fecha_nat" in validacion:
+            st.markdown(
+                f"**Sin fecha de creación:** {validacion['fecha_nat']:,} ({validacion['fecha_nat_pct']}%) "
+                "— fuera de todas las ventanas"
+            )
+        for col in ["fecha_restablecimiento", "fecha_resuelto"]:
+            if f"{col}_antes_creacion" in validacion:
+                st.markdown(f"**{col} anterior a la creación:** {validacion[f'{col}_antes_creacion']:,} — no se usan para el MTTR")
+        if "downtime_fuera_rango" in validacion:
+            st.markdown(f"**Downtime negativo o > 31 días:** {validacion['downtime_fuera_rango']:,} — negativos en 0, resto acotado a 31 días")
+
 # Apply filters
 mask = pd.Series([True] * len(df), index=df.index)
 if filter_pais and "pais" in df.columns:
@@ -460,49 +642,72 @@ df_f = df[mask].copy()
 # ─────────────────────────────────────────────
 # DATE HELPERS
 # ─────────────────────────────────────────────
-now = datetime.now()
-inicio_mes_actual = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-inicio_trimestre = now - timedelta(days=90)
-inicio_30d = now - timedelta(days=30)
+as_of = calculos.fecha_corte(as_of_dia)
 
 date_col = "fecha_creacion" if "fecha_creacion" in df_f.columns else None
 
+# Clave de caché: contenido del dataset + filtros globales aplicados
+version = (
+    st.session_state.df_version, opciones_std,
+    tuple(filter_pais), tuple(filter_cliente), filter_fecha_start, filter_fecha_end,
+)
+
 # ─────────────────────────────────────────────
 # KPI ROW
 # ─────────────────────────────────────────────
-total_tickets = len(df_f)
-if date_col:
-    tickets_mes = df_f[df_f[date_col] >= inicio_mes_actual]
-    total_mes = len(tickets_mes)
-else:
-    total_mes = 0
-
-servicios_uniq = df_f["servicio"].nunique() if "servicio" in df_f.columns else 0
-clientes_uniq = df_f["cliente"].nunique() if "cliente" in df_f.columns else 0
+kpis = reporte_kpis(df_f, version, as_of)
 
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("🎫 Total Tickets", f"{total_tickets:,}")
-col2.metric("📅 Tickets Este Mes", f"{total_mes:,}")
-col3.metric("🔗 Servicios Únicos", f"{servicios_uniq:,}")
-col4.metric("🏢 Clientes", f"{clientes_uniq:,}")
+col1.metric("🎫 Total Tickets", f"{kpis['total_tickets']:,}")
+col2.metric("📅 Tickets Este Mes", f"{kpis['total_mes']:,}")
+col3.metric("🔗 Servicios Únicos", f"{kpis['servicios_uniq']:,}")
+col4.metric("🏢 Clientes", f"{kpis['clientes_uniq']:,}")
+if as_of_dia != date.today():
+    st.caption(f"📆 Reporte a la fecha de corte **{as_of_dia.strftime('%d/%m/%Y')}**")
+
+# ─────────────────────────────────────────────
+# SNAPSHOT PARA EL VISOR
+# ─────────────────────────────────────────────
+with st.sidebar:
+    st.markdown("---")
+    publicar = st.button(
+        "💾 Publicar snapshot",
+        use_container_width=True,
+        help="Guarda los reportes con los filtros y la fecha de corte actuales para el visor "
+             "de solo lectura (?modo=visor o streamlit run app.py -- --visor).",
+    )
+    if publicar:
+        if date_col is None or "servicio" not in df_f.columns:
+            st.warning("Se requieren columnas de fecha y servicio para publicar un snapshot.")
+        else:
+            reinc = reporte_reincidencias(df_f, version, as_of)
+            tablas_snap = {
+                "reincidencias": reinc[reinc["reincidente"]].sort_values("incidentes_mes", ascending=False),
+                "mtbf": reporte_mtbf(df_f, version, as_of),
+                "alertas": reporte_alertas(df_f, version, as_of),
+            }
+            if "tiempo_ufinet_min" in df_f.columns:
+                tablas_snap["disponibilidad"] = reporte_disponibilidad(df_f, version, as_of, sla_objetivo)
+            ruta_snap = snapshots.guardar_snapshot(
+                tablas_snap,
+                kpis,
+                {"as_of": as_of, "dataset": st.session_state.df_version, "sla_objetivo": sla_objetivo},
+            )
+            st.success(f"✅ Snapshot publicado: `{os.path.basename(ruta_snap)}`")
 
 st.markdown("---")
 
 # ─────────────────────────────────────────────
-# TABS
+# SECCIONES
 # ─────────────────────────────────────────────
-tab1, tab2, tab3, tab4 = st.tabs([
-    "🔁 Reincidencias (Punto 2)",
-    "⏱️ MTBF (Punto 3)",
-    "📶 Disponibilidad (Puntos 4-5)",
-    "📊 Alertas Diarias (Punto 1)",
-])
-
+# Cada sección es un fragmento: solo se ejecuta la vista seleccionada y los
+# widgets de una sección vuelven a correr solo esa sección, no toda la app.
 
 # ═══════════════════════════════════════════
-# TAB 1 – REINCIDENCIAS ⭐ URGENTE
+# SECCIÓN 1 – REINCIDENCIAS ⭐ URGENTE
 # ═══════════════════════════════════════════
-with tab1:
+@st.fragment
+def seccion_reincidencias(df_f, version, as_of):
     st.markdown('<div class="section-title">🔁 Reporte de Reincidencias / Recurrencias</div>', unsafe_allow_html=True)
     st.markdown("""
     > **Criterios de alerta:**  
@@ -513,33 +718,7 @@ with tab1:
     if date_col is None or "servicio" not in df_f.columns:
         st.warning("Se requieren columnas de fecha y servicio para calcular reincidencias.")
     else:
-        # Build per-service counts
-        df_mes = df_f[df_f[date_col] >= inicio_mes_actual]
-        df_30d = df_f[df_f[date_col] >= inicio_30d]
-        df_trim = df_f[df_f[date_col] >= inicio_trimestre]
-
-        cnt_mes = df_mes.groupby("servicio").size().rename("incidentes_mes")
-        cnt_30d = df_30d.groupby("servicio").size().rename("incidentes_30d")
-        cnt_trim = df_trim.groupby("servicio").size().rename("incidentes_trimestre")
-
-        stats = pd.concat([cnt_mes, cnt_30d, cnt_trim], axis=1).fillna(0).astype(int)
-        stats = stats.reset_index()
-
-        # Criterio 1: >2 en último mes
-        crit1 = stats["incidentes_mes"] > 2
-        # Criterio 2: >2 en último trimestre Y al menos 1 en último mes
-        crit2 = (stats["incidentes_trimestre"] > 2) & (stats["incidentes_mes"] >= 1)
-
-        stats["reincidente"] = crit1 | crit2
-        stats["motivo"] = ""
-        stats.loc[crit1 & ~crit2, "motivo"] = "🔴 >2 incidentes en el mes"
-        stats.loc[~crit1 & crit2, "motivo"] = "🟠 >2 en trimestre + activo en mes"
-        stats.loc[crit1 & crit2, "motivo"] = "🔴 Ambos criterios"
-
-        # Merge with cliente info
-        if "cliente" in df_f.columns:
-            cliente_map = df_f.groupby("servicio")["cliente"].first().rename("cliente")
-            stats = stats.merge(cliente_map, on="servicio", how="left")
+        stats = reporte_reincidencias(df_f, version, as_of)
 
         reincidentes = stats[stats["reincidente"]].sort_values("incidentes_mes", ascending=False)
         no_reincidentes = stats[~stats["reincidente"]]
@@ -572,10 +751,11 @@ with tab1:
 
             df_show = reincidentes.copy()
             if search_srv:
-                mask_s = df_show["servicio"].str.contains(search_srv, case=False, na=False)
-                if "cliente" in df_show.columns:
-                    mask_s |= df_show["cliente"].str.contains(search_srv, case=False, na=False)
-                df_show = df_show[mask_s]
+                scores = indice_busqueda(df, st.session_state.df_version, opciones_std).buscar(search_srv)
+                puntaje = df_show["servicio"].astype(str).map(scores)
+                df_show = df_show[puntaje.notna()].iloc[np.argsort(-puntaje.dropna().to_numpy(), kind="stable")]
+                if len(scores) and scores.iloc[0] < 1:
+                    st.caption(f"Sin coincidencias exactas para «{search_srv}»; se muestran los más parecidos.")
             if motivo_filter:
                 df_show = df_show[df_show["motivo"].isin(motivo_filter)]
 
@@ -610,12 +790,14 @@ with tab1:
             st.markdown("---")
             st.markdown("### 📋 Detalle de tickets por servicio reincidente")
             if len(reincidentes) > 0:
+                # Con búsqueda activa, el selector ofrece los resultados en orden de relevancia
+                opciones_srv = df_show["servicio"].tolist() if search_srv and len(df_show) else reincidentes["servicio"].tolist()
                 srv_sel = st.selectbox(
                     "Selecciona un servicio para ver sus tickets",
-                    reincidentes["servicio"].tolist(),
+                    opciones_srv,
                     key="srv_detail"
                 )
-                tickets_srv = df_f[df_f["servicio"] == srv_sel].copy()
+                tickets_srv = calculos.hasta_corte(df_f[df_f["servicio"] == srv_sel], as_of)
                 detail_cols = [c for c in ["ticket_id", "fecha_creacion", "fecha_resuelto", "titulo", "cliente", "pais", "prioridad"] if c in tickets_srv.columns]
                 st.dataframe(
                     tickets_srv[detail_cols].sort_values("fecha_creacion", ascending=False),
@@ -624,12 +806,14 @@ with tab1:
 
 
 # ═══════════════════════════════════════════
-# TAB 2 – MTBF
+# SECCIÓN 2 – MTBF
 # ═══════════════════════════════════════════
-with tab2:
+@st.fragment
+def seccion_mtbf(df_f, version, as_of):
     st.markdown('<div class="section-title">⏱️ MTBF – Mean Time Between Failures</div>', unsafe_allow_html=True)
     st.markdown("""
-    > Promedio de días entre fallas. Evalúa la estabilidad de cada servicio.
+    > Promedio de días entre fallas. Evalúa la estabilidad de cada servicio.  
+    > Brechas entre fallas consecutivas en horas (mediana, P90, mínima) y **MTTR**: creación → restablecimiento del servicio.
     
     | MTBF | Nivel |
     |------|-------|
@@ -649,40 +833,18 @@ with tab2:
     if date_col is None or "servicio" not in df_f.columns:
         st.warning("Se requieren columnas de fecha y servicio para calcular MTBF.")
     else:
-        df_30d_mtbf = df_f[df_f[date_col] >= inicio_30d].copy()
-
-        mtbf_records = []
-        for srv, grp in df_30d_mtbf.groupby("servicio"):
-            fechas = grp[date_col].dropna().sort_values().tolist()
-            if len(fechas) < 2:
-                continue
-            diffs = [(fechas[i+1] - fechas[i]).days for i in range(len(fechas)-1)]
-            mtbf_val = round(np.mean(diffs), 1)
-            n_fallas = len(fechas)
-
-            if mtbf_val > 30:
-                nivel = "🟢 Estable (>30d)"
-            elif mtbf_val >= 15:
-                nivel = "🟡 Moderado (15-30d)"
-            elif mtbf_val >= 7:
-                nivel = "🟠 Inestable (7-15d)"
-            else:
-                nivel = "🔴 Crítico (<7d)"
-
-            cliente_val = grp["cliente"].iloc[0] if "cliente" in grp.columns else "-"
-            mtbf_records.append({
-                "Servicio": srv,
-                "Cliente": cliente_val,
-                "MTBF (días)": mtbf_val,
-                "# Fallas (30d)": n_fallas,
-                "Nivel": nivel,
-            })
-
-        if not mtbf_records:
-            st.info("No hay servicios con más de 1 incidente en los últimos 30 días.")
-        else:
-            df_mtbf = pd.DataFrame(mtbf_records).sort_values("MTBF (días)")
+        VENTANAS_MTBF = {30: "Últimos 30 días", 90: "Últimos 90 días", 180: "Últimos 180 días", 365: "Último año", None: "Todo el histórico"}
+        dias_mtbf = st.selectbox(
+            "Ventana de análisis",
+            list(VENTANAS_MTBF),
+            format_func=VENTANAS_MTBF.get,
+            key="ventana_mtbf",
+        )
+        df_mtbf = reporte_mtbf(df_f, version, as_of, dias_mtbf)
 
+        if df_mtbf.empty:
+            st.info("No hay incidentes en la ventana seleccionada.")
+        else:
             # KPI
             km1, km2, km3, km4 = st.columns(4)
             km1.metric("🔴 Críticos (<7d)", len(df_mtbf[df_mtbf["Nivel"].str.startswith("🔴")]))
@@ -690,10 +852,11 @@ with tab2:
             km3.metric("🟡 Moderados (15-30d)", len(df_mtbf[df_mtbf["Nivel"].str.startswith("🟡")]))
             km4.metric("🟢 Estables (>30d)", len(df_mtbf[df_mtbf["Nivel"].str.startswith("🟢")]))
 
+            niveles = df_mtbf["Nivel"].unique().tolist()
             nivel_filter = st.multiselect(
                 "Filtrar por nivel MTBF",
-                df_mtbf["Nivel"].unique().tolist(),
-                default=df_mtbf["Nivel"].unique().tolist(),
+                niveles,
+                default=[n for n in niveles if not n.startswith("⚪")],
             )
             df_mtbf_show = df_mtbf[df_mtbf["Nivel"].isin(nivel_filter)]
 
@@ -704,13 +867,15 @@ with tab2:
 
 
 # ═══════════════════════════════════════════
-# TAB 3 – DISPONIBILIDAD
+# SECCIÓN 3 – DISPONIBILIDAD
 # ═══════════════════════════════════════════
-with tab3:
-    st.markdown('<div class="section-title">📶 Disponibilidad – SLA 99.8%</div>', unsafe_allow_html=True)
-    st.markdown("""
+@st.fragment
+def seccion_disponibilidad(df_f, version, as_of):
+    permitido_mes = calculos.downtime_permitido(pd.PeriodIndex([as_of], freq="M"), sla_objetivo)[0]
+    st.markdown(f'<div class="section-title">📶 Disponibilidad – SLA {sla_objetivo:g}%</div>', unsafe_allow_html=True)
+    st.markdown(f"""
     > **Fórmula:** Consumo SLA = Downtime acumulado / Downtime permitido  
-    > **Downtime permitido** al 99.8% de disponibilidad mensual ≈ **87.6 minutos/mes** (en un mes de 30d)
+    > **Downtime permitido** al {sla_objetivo:g}% de disponibilidad mensual = **{permitido_mes:.1f} minutos** en {as_of.strftime("%m/%Y")} (según los días del mes)
     
     | Consumo SLA | Nivel |
     |-------------|-------|
@@ -720,37 +885,12 @@ with tab3:
     | > 95% | 🔴 Crítico |
     """)
 
-    DOWNTIME_PERMITTED_MIN = 87.6  # minutos/mes (99.8% disponibilidad, mes de 30 días)
-
     if "tiempo_ufinet_min" not in df_f.columns or date_col is None or "servicio" not in df_f.columns:
         st.warning("Se requieren columnas 'Tiempo imputable a Ufinet', fecha y servicio.")
     else:
-        df_mes_disp = df_f[df_f[date_col] >= inicio_mes_actual].copy()
-        df_mes_disp["tiempo_ufinet_min"] = pd.to_numeric(df_mes_disp["tiempo_ufinet_min"], errors="coerce").fillna(0)
-        # Convert seconds to minutes if values look too large
-        if df_mes_disp["tiempo_ufinet_min"].median() > 10000:
-            df_mes_disp["tiempo_ufinet_min"] = df_mes_disp["tiempo_ufinet_min"] / 60
-
-        disp_stats = df_mes_disp.groupby("servicio").agg(
-            downtime_acum=("tiempo_ufinet_min", "sum"),
-            n_tickets=("ticket_id", "count") if "ticket_id" in df_mes_disp.columns else ("servicio", "count"),
-        ).reset_index()
-
-        if "cliente" in df_f.columns:
-            cm = df_f.groupby("servicio")["cliente"].first().reset_index()
-            disp_stats = disp_stats.merge(cm, on="servicio", how="left")
-
-        disp_stats["consumo_sla"] = (disp_stats["downtime_acum"] / DOWNTIME_PERMITTED_MIN * 100).round(1)
-        disp_stats["consumo_sla"] = disp_stats["consumo_sla"].clip(0, 100)
-
-        def sla_nivel(c):
-            if c < 60: return "🟢 Seguro"
-            elif c < 80: return "🟡 Atención"
-            elif c < 95: return "🟠 Riesgo"
-            else: return "🔴 Crítico"
-
-        disp_stats["nivel_sla"] = disp_stats["consumo_sla"].apply(sla_nivel)
-        disp_stats = disp_stats.sort_values("consumo_sla", ascending=False)
+        disp_stats = reporte_disponibilidad(df_f, version, as_of, sla_objetivo)
+        if df.attrs.get("unidad_tiempo") == "seg":
+            st.caption("ℹ️ 'Tiempo imputable a Ufinet' viene en segundos; convertido a minutos.")
 
         # KPIs
         kd1, kd2, kd3, kd4 = st.columns(4)
@@ -781,24 +921,44 @@ with tab3:
         csv_disp = disp_stats.to_csv(index=False).encode("utf-8")
         st.download_button("⬇️ Exportar Disponibilidad CSV", csv_disp, "disponibilidad_ufinet.csv", "text/csv")
 
+        st.markdown("---")
+        # Toggle y no expander: el cuerpo de un expander corre aunque esté cerrado
+        if st.toggle("📅 Histórico mensual de SLA (todos los meses hasta la fecha de corte)", key="ver_sla_mensual"):
+            sla_mensual = reporte_sla_mensual(df_f, version, as_of, sla_objetivo)
+            meses = sorted(sla_mensual["mes"].astype(str).unique().tolist(), reverse=True)
+            meses_sel = st.multiselect("Meses", meses, default=meses[:3], key="sla_meses")
+            sla_show = sla_mensual[sla_mensual["mes"].astype(str).isin(meses_sel)]
+            cols_sla_m = ["mes"] + display_cols_d + ["downtime_permitido"]
+            st.dataframe(
+                sla_show[cols_sla_m].rename(columns={
+                    "mes": "Mes",
+                    "servicio": "Servicio",
+                    "cliente": "Cliente",
+                    "nivel_sla": "Nivel SLA",
+                    "consumo_sla": "Consumo SLA (%)",
+                    "downtime_acum": "Downtime Acum. (min)",
+                    "n_tickets": "# Tickets",
+                    "downtime_permitido": "Downtime Permitido (min)",
+                }),
+                use_container_width=True,
+                height=400,
+            )
+            csv_sla_m = sla_show.to_csv(index=False).encode("utf-8")
+            st.download_button("⬇️ Exportar SLA Mensual CSV", csv_sla_m, "sla_mensual_ufinet.csv", "text/csv")
+
 
 # ═══════════════════════════════════════════
-# TAB 4 – ALERTAS DIARIAS (Punto 1)
+# SECCIÓN 4 – ALERTAS DIARIAS (Punto 1)
 # ═══════════════════════════════════════════
-with tab4:
+@st.fragment
+def seccion_alertas(df_f, version, as_of):
     st.markdown('<div class="section-title">🔔 Alertas Diarias – Servicios con >2 eventos en el mes</div>', unsafe_allow_html=True)
     st.markdown("> Servicios que ya superaron **2 incidentes** en el mes en curso. Reportar a Operación & Mantenimiento.")
 
     if date_col is None or "servicio" not in df_f.columns:
         st.warning("Se requieren columnas de fecha y servicio.")
     else:
-        df_mes_alert = df_f[df_f[date_col] >= inicio_mes_actual]
-        cnt_alert = df_mes_alert.groupby("servicio").size().reset_index(name="incidentes_mes")
-        if "cliente" in df_f.columns:
-            cm2 = df_f.groupby("servicio")["cliente"].first().reset_index()
-            cnt_alert = cnt_alert.merge(cm2, on="servicio", how="left")
-
-        alertas = cnt_alert[cnt_alert["incidentes_mes"] > 2].sort_values("incidentes_mes", ascending=False)
+        alertas = reporte_alertas(df_f, version, as_of)
 
         if len(alertas) == 0:
             st.success("✅ Ningún servicio supera los 2 incidentes este mes.")
@@ -819,10 +979,19 @@ with tab4:
             csv_a = alertas.to_csv(index=False).encode("utf-8")
             st.download_button("⬇️ Exportar Alertas CSV", csv_a, "alertas_diarias_ufinet.csv", "text/csv")
 
+VISTAS = {
+    "🔁 Reincidencias (Punto 2)": seccion_reincidencias,
+    "⏱️ MTBF (Punto 3)": seccion_mtbf,
+    "📶 Disponibilidad (Puntos 4-5)": seccion_disponibilidad,
+    "📊 Alertas Diarias (Punto 1)": seccion_alertas,
+}
+vista = st.radio("Vista", list(VISTAS), horizontal=True, label_visibility="collapsed", key="vista")
+VISTAS[vista](df_f, version, as_of)
+
 # Footer
 st.markdown("---")
 st.markdown(
     '<p style="text-align:center; color:#666; font-size:0.8rem;">Ufinet Monitor de Incidencias · Desarrollado con Streamlit · '
-    + datetime.now().strftime("%d/%m/%Y %H:%M") + "</p>",
+    + datetime.now().strftime("%d/%m/%Y %H:%M") + " · Corte " + as_of_dia.strftime("%d/%m/%Y") + "</p>",
     unsafe_allow_html=True,
 )
@@ -0,0 +1,43 @@
+"""Backfill de alertas diarias (Punto 1) para un rango de fechas de corte.
+
+Uso:
+    python backfill_alertas.py tickets.xlsx --desde 2025-10-01 --hasta 2026-09-30 -o alertas.csv
+
+Genera en un solo proceso el snapshot de alertas que O&M habría recibido cada
+día del rango, con las mismas reglas que la pestaña "Alertas Diarias" de app.py.
+"""
+import argparse
+import sys
+from datetime import date
+
+import pandas as pd
+
+import calculos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill de alertas diarias Ufinet.")
+    parser.add_argument("excel", help="Archivo Excel (.xlsx) con los tickets")
+    parser.add_argument("--desde", type=date.fromisoformat, required=True, help="Primera fecha de corte (AAAA-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, default=date.today(), help="Última fecha de corte (AAAA-MM-DD)")
+    parser.add_argument("-o", "--salida", default="alertas_backfill_ufinet.csv", help="CSV de salida")
+    args = parser.parse_args(argv)
+
+    if args.hasta < args.desde:
+        parser.error("--hasta debe ser posterior a --desde")
+
+    df = pd.read_excel(args.excel, engine="openpyxl")
+    df.columns = calculos.limpiar_encabezados(df.columns)
+    df = calculos.validar_df(calculos.standardize_df(df))
+    if calculos.DATE_COL not in df.columns or "servicio" not in df.columns:
+        print("❌ Se requieren columnas de fecha y servicio.", file=sys.stderr)
+        return 1
+
+    alertas = calculos.backfill_alertas(df, args.desde, args.hasta)
+    alertas.to_csv(args.salida, index=False)
+    print(f"✅ {len(alertas):,} filas de alerta en {alertas['fecha_corte'].nunique():,} días → {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Índice de búsqueda de servicios y clientes para el Monitor de Incidencias Ufinet.
+
+Se construye una vez por versión de datos sobre los nombres únicos (no sobre
+las filas de tickets): texto en minúsculas y sin tildes, indexado por
+trigramas. Una consulta se resuelve intersectando listas de trigramas y, si
+no hay coincidencia literal, con un ranking difuso por trigramas compartidos.
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+SIMILITUD_MINIMA = 0.3  # Jaccard de trigramas para aceptar una coincidencia difusa
+MAX_DIFUSOS = 50
+
+
+def normalizar(texto) -> str:
+    """Minúsculas, sin tildes ni espacios repetidos: 'Telefónica  Perú' -> 'telefonica peru'."""
+    texto = unicodedata.normalize("NFKD", str(texto).casefold())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.split())
+
+
+def trigramas(texto: str) -> set:
+    return {texto[i:i+3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusqueda:
+    """Trigramas sobre los nombres de servicio y de cliente.
+
+    Cada nombre único es un "documento" que apunta a uno o más servicios
+    (un cliente apunta a todos sus servicios), así que buscar por cliente
+    devuelve sus servicios.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        cols = [c for c in ["servicio", "cliente"] if c in df.columns]
+        pares = df[cols].dropna(subset=["servicio"]).drop_duplicates()
+
+        self.servicios, srv_codes = np.unique(pares["servicio"].astype(str).to_numpy(), return_inverse=True)
+
+        docs = {}
+        for col in cols:
+            presentes = pares[col].notna().to_numpy()
+            nombres = pares.loc[presentes, col].astype(str).map(normalizar).to_numpy()
+            for nombre, srv in zip(nombres, srv_codes[presentes]):
+                if nombre:
+                    docs.setdefault(nombre, set()).add(srv)
+
+        self.nombres = list(docs)
+        self.servicios_doc = [np.fromiter(s, dtype=np.int64) for s in docs.values()]
+        self.n_trigramas = np.array([len(trigramas(n)) for n in self.nombres])
+
+        postings = {}
+        for doc_id, nombre in enumerate(self.nombres):
+            for tri in trigramas(nombre):
+                postings.setdefault(tri, []).append(doc_id)
+        self.postings = {tri: np.array(ids, dtype=np.int64) for tri, ids in postings.items()}
+
+    def _literales(self, consulta: str) -> np.ndarray:
+        tris = trigramas(consulta)
+        if not tris:
+            # Consulta de 1-2 caracteres: recorrer nombres únicos es barato
+            candidatos = range(len(self.nombres))
+        else:
+            listas = sorted((self.postings.get(t, np.empty(0, dtype=np.int64)) for t in tris), key=len)
+            candidatos = listas[0]
+            for ids in listas[1:]:
+                if len(candidatos) == 0:
+                    break
+                candidatos = np.intersect1d(candidatos, ids, assume_unique=True)
+        return np.array([d for d in candidatos if consulta in self.nombres[d]], dtype=np.int64)
+
+    def _difusos(self, consulta: str) -> tuple:
+        tris = [self.postings[t] for t in trigramas(consulta) if t in self.postings]
+        if not tris:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        hits = np.bincount(np.concatenate(tris), minlength=len(self.nombres))
+        docs = np.flatnonzero(hits)
+        sim = hits[docs] / (len(trigramas(consulta)) + self.n_trigramas[docs] - hits[docs])
+        ok = sim >= SIMILITUD_MINIMA
+        docs, sim = docs[ok], sim[ok]
+        top = np.argsort(-sim, kind="stable")[:MAX_DIFUSOS]
+        return docs[top], sim[top]
+
+    def buscar(self, consulta: str) -> pd.Series:
+        """Puntaje por servicio, de mayor a menor.
+
+        Coincidencias literales puntúan en [1, 3] (igual > prefijo > contiene);
+        si no hay ninguna, se devuelven coincidencias difusas con puntaje < 1.
+        """
+        consulta = normalizar(consulta)
+        if not consulta:
+            return pd.Series(dtype=float)
+
+        docs = self._literales(consulta)
+        if len(docs):
+            puntajes = np.array([
+                3.0 if self.nombres[d] == consulta
+                else 2.0 if self.nombres[d].startswith(consulta)
+                else 1.0 + len(consulta) / len(self.nombres[d])
+                for d in docs
+            ])
+        else:
+            docs, puntajes = self._difusos(consulta)
+
+        if len(docs) == 0:
+            return pd.Series(dtype=float)
+        srv_ids = np.concatenate([self.servicios_doc[d] for d in docs])
+        srv_pts = np.repeat(puntajes, [len(self.servicios_doc[d]) for d in docs])
+        mejor = np.zeros(len(self.servicios))
+        np.maximum.at(mejor, srv_ids, srv_pts)
+        ids = np.flatnonzero(mejor)
+        orden = ids[np.argsort(-mejor[ids], kind="stable")]
+        return pd.Series(mejor[orden], index=self.servicios[orden])
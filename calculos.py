@@ -0,0 +1,512 @@
+"""Cálculos del Monitor de Incidencias Ufinet.
+
+Funciones puras sobre pandas (sin Streamlit) para que app.py y los procesos
+batch (ver backfill_alertas.py) produzcan exactamente los mismos reportes.
+Todas las ventanas se anclan en una fecha de corte explícita (``as_of``) en
+lugar de ``datetime.now()``, de modo que el reporte de cualquier día pasado
+se puede reconstruir tal como se vio ese día.
+"""
+import hashlib
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+COL_MAP = {
+    "Id de Ticket": "ticket_id",
+    "Fecha y Hora de creación": "fecha_creacion",
+    "Fecha de restablecimiento del servicio": "fecha_restablecimiento",
+    "Fecha estado resuelto": "fecha_resuelto",
+    "Cliente Customer": "cliente",
+    "Servicio afectado": "servicio",
+    "País Origen": "pais",
+    "Prioridad": "prioridad",
+    "Tiempo imputable a Ufinet": "tiempo_ufinet_min",
+    "Capacidad (Mpbs)": "capacidad",
+    "Título de la Incidencia": "titulo",
+    "Tipo de Incidencia": "tipo_incidencia",
+    "Imputable a": "imputable",
+    "Código administrativo": "codigo_admin",
+    "Cliente Final (Servicio afectado) (Servicios contratados)": "cliente_final",
+}
+
+DATE_COLS = ["fecha_creacion", "fecha_restablecimiento", "fecha_resuelto"]
+
+# Formatos probados en orden (rápidos, sin inferencia) antes de caer en el parser genérico.
+# El primero es el de la exportación de Google Sheets en configuración regional es.
+FORMATOS_FECHA = (
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+)
+
+DATE_COL = "fecha_creacion"
+UMBRAL_INCIDENTES = 2  # >2 incidentes dispara la alerta / reincidencia
+SLA_OBJETIVO = 99.8  # % de disponibilidad mensual comprometida
+
+UNIDADES_TIEMPO = {
+    "auto": "Detectar automáticamente",
+    "min": "Minutos",
+    "seg": "Segundos",
+}
+UMBRAL_SEGUNDOS = 10000  # mediana de downtimes > 10000 "min" (~7 días) => la columna viene en segundos
+MINUTOS_MES_MAX = 31 * 24 * 60
+
+
+def detectar_unidad_tiempo(tiempos: pd.Series) -> str:
+    """Adivina si el downtime viene en segundos o minutos.
+
+    Se miran los valores positivos de toda la columna (los tickets sin tiempo
+    imputable son mayoría en muchos meses y hundirían la mediana): se asume
+    segundos si la mediana supera ``UMBRAL_SEGUNDOS`` o si el p95 excede los
+    minutos de un mes completo, algo imposible para un solo ticket.
+    """
+    positivos = tiempos[tiempos > 0]
+    if positivos.empty:
+        return "min"
+    if positivos.median() > UMBRAL_SEGUNDOS or positivos.quantile(0.95) > MINUTOS_MES_MAX:
+        return "seg"
+    return "min"
+
+
+def limpiar_encabezados(headers) -> list:
+    """Encabezados sin espacios sobrantes, sin vacíos y sin duplicados (``X``, ``X_1``, ...)."""
+    seen = {}
+    clean_headers = []
+    for h in headers:
+        h = str(h).strip() if h is not None else ""
+        if not h or h.startswith("Unnamed:"):
+            h = "sin_nombre"
+        if h in seen:
+            seen[h] += 1
+            h = f"{h}_{seen[h]}"
+        else:
+            seen[h] = 0
+        clean_headers.append(h)
+    return clean_headers
+
+
+def _a_datetime(textos: pd.Series, **kwargs) -> pd.Series:
+    """``pd.to_datetime`` tolerante a offsets: todo se lleva a UTC y se deja sin zona."""
+    fechas = pd.to_datetime(textos, errors="coerce", utc=True, **kwargs)
+    return fechas.dt.tz_convert(None).astype("datetime64[ns]")
+
+
+def parse_fechas(serie: pd.Series, formatos=FORMATOS_FECHA, dayfirst: bool = True):
+    """Convierte una columna a datetime y cuenta cuántos valores quedaron en NaT.
+
+    Los timestamps se repiten mucho, así que se parsea cada valor único una sola
+    vez (``pd.factorize``) y el resultado se expande con los códigos. Cada
+    formato explícito se prueba en bloque sobre lo que aún no se pudo leer; lo
+    que queda se intenta como ISO 8601 (nunca con día primero) y solo el resto
+    pasa por la inferencia genérica (lenta) con ``dayfirst``. Los valores con
+    offset (``Z``, ``-03:00``) se normalizan a UTC sin zona.
+
+    Devuelve ``(serie_datetime, n_coercionados)``; los vacíos no cuentan como
+    coercionados.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie, 0
+
+    codes, uniques = pd.factorize(serie)
+    textos = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=textos.index, dtype="datetime64[ns]")
+
+    pendientes = textos != ""
+    for fmt in formatos:
+        if not pendientes.any():
+            break
+        parsed[pendientes] = _a_datetime(textos[pendientes], format=fmt)
+        pendientes = parsed.isna() & (textos != "")
+    if pendientes.any():
+        parsed[pendientes] = _a_datetime(textos[pendientes], format="ISO8601")
+        pendientes = parsed.isna() & (textos != "")
+    if pendientes.any():
+        parsed[pendientes] = _a_datetime(textos[pendientes], format="mixed", dayfirst=dayfirst)
+        pendientes = parsed.isna() & (textos != "")
+
+    # codes == -1 (nulos) apunta al NaT agregado al final
+    valores = np.append(parsed.to_numpy(), np.datetime64("NaT", "ns"))
+    resultado = pd.Series(valores[codes], index=serie.index, name=serie.name)
+    n_coercionados = int(np.bincount(codes[codes >= 0], minlength=len(textos))[pendientes.to_numpy()].sum())
+    return resultado, n_coercionados
+
+
+def standardize_df(
+    df: pd.DataFrame,
+    unidad_tiempo: str = "auto",
+    formatos_fecha=FORMATOS_FECHA,
+    dayfirst: bool = True,
+) -> pd.DataFrame:
+    """Rename columns to standard internal names.
+
+    ``tiempo_ufinet_min`` queda siempre en minutos: ``unidad_tiempo`` fuerza la
+    unidad de origen ("min" / "seg") o, con "auto", se detecta una sola vez
+    sobre el dataset completo. La unidad aplicada y la cantidad de fechas no
+    interpretables por columna quedan en ``df.attrs``.
+    """
+    df = df.rename(columns={k: v for k, v in COL_MAP.items() if k in df.columns})
+
+    # Parse dates
+    df.attrs["fechas_nat"] = {}
+    for col in DATE_COLS:
+        if col in df.columns:
+            df[col], n_nat = parse_fechas(df[col], formatos_fecha, dayfirst)
+            df.attrs["fechas_nat"][col] = n_nat
+
+    # Numeric
+    if "tiempo_ufinet_min" in df.columns:
+        df["tiempo_ufinet_min"] = pd.to_numeric(df["tiempo_ufinet_min"], errors="coerce").fillna(0)
+        if unidad_tiempo == "auto":
+            unidad_tiempo = detectar_unidad_tiempo(df["tiempo_ufinet_min"])
+        if unidad_tiempo == "seg":
+            df["tiempo_ufinet_min"] = df["tiempo_ufinet_min"] / 60
+        df.attrs["unidad_tiempo"] = unidad_tiempo
+
+    return df
+
+
+def validar_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Controles de calidad sobre el DataFrame estandarizado, en una sola pasada vectorizada.
+
+    - ``ticket_id`` duplicados (pestañas solapadas): se conserva la última fila.
+    - Fechas de creación vacías o no interpretables (NaT): quedan fuera de toda ventana.
+    - Downtime negativo (se pone en 0) o mayor que un mes completo (se acota a
+      ``MINUTOS_MES_MAX``): la caída sigue contando como incumplimiento total.
+    - Resuelto / restablecido antes de la creación: se cuentan; el MTTR ya los ignora.
+
+    Devuelve un DataFrame nuevo (no modifica el recibido) con los conteos en
+    ``df.attrs["validacion"]``.
+    """
+    attrs = dict(df.attrs)
+    reporte = {"filas": len(df)}
+
+    if "ticket_id" in df.columns:
+        duplicado = df["ticket_id"].notna() & df["ticket_id"].duplicated(keep="last")
+        reporte["duplicados"] = int(duplicado.sum())
+        df = df[~duplicado].copy() if reporte["duplicados"] else df.copy()
+    else:
+        df = df.copy()
+
+    if DATE_COL in df.columns:
+        reporte["fecha_nat"] = int(df[DATE_COL].isna().sum())
+        reporte["fecha_nat_pct"] = round(reporte["fecha_nat"] / max(len(df), 1) * 100, 2)
+        for col in ["fecha_restablecimiento", "fecha_resuelto"]:
+            if col in df.columns:
+                reporte[f"{col}_antes_creacion"] = int((df[col] < df[DATE_COL]).sum())
+
+    if "tiempo_ufinet_min" in df.columns:
+        fuera = (df["tiempo_ufinet_min"] < 0) | (df["tiempo_ufinet_min"] > MINUTOS_MES_MAX)
+        reporte["downtime_fuera_rango"] = int(fuera.sum())
+        if reporte["downtime_fuera_rango"]:
+            df["tiempo_ufinet_min"] = df["tiempo_ufinet_min"].clip(0, MINUTOS_MES_MAX)
+
+    df.attrs = {**attrs, "validacion": reporte}
+    return df
+
+
+# ─────────────────────────────────────────────
+# FECHA DE CORTE (AS-OF)
+# ─────────────────────────────────────────────
+FIN_DE_DIA = time(23, 59, 59)
+
+
+def fecha_corte(dia: date) -> datetime:
+    """Timestamp de corte para un día: se incluyen todos los tickets creados ese día."""
+    return datetime.combine(dia, FIN_DE_DIA)
+
+
+def ventanas(as_of: datetime) -> dict:
+    """Inicio de cada ventana de análisis (mes en curso, 30 días, trimestre) a la fecha de corte."""
+    return {
+        "mes": as_of.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+        "30d": as_of - timedelta(days=30),
+        "trimestre": as_of - timedelta(days=90),
+    }
+
+
+def hasta_corte(df: pd.DataFrame, as_of: datetime) -> pd.DataFrame:
+    """Tickets existentes a la fecha de corte (creados en o antes de ``as_of``)."""
+    return df[df[DATE_COL] <= as_of]
+
+
+def version_dataset(df: pd.DataFrame) -> str:
+    """Huella del contenido del dataset; clave de caché de los reportes por fecha de corte.
+
+    Incluye los encabezados y el orden de las filas: ``_cliente_por_servicio``
+    toma el primer cliente en orden de filas, así que una hoja reordenada es
+    otro dataset.
+    """
+    h = hashlib.sha1(repr(tuple(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return f"{len(df)}-{h.hexdigest()[:16]}"
+
+
+def _cliente_por_servicio(df: pd.DataFrame) -> pd.Series:
+    return df.groupby("servicio")["cliente"].first().rename("cliente")
+
+
+# ─────────────────────────────────────────────
+# REPORTES
+# ─────────────────────────────────────────────
+def calcular_kpis(df: pd.DataFrame, as_of: datetime) -> dict:
+    """KPIs de cabecera a la fecha de corte."""
+    if DATE_COL not in df.columns:
+        df_c, total_mes = df, 0
+    else:
+        df_c = hasta_corte(df, as_of)
+        total_mes = int((df_c[DATE_COL] >= ventanas(as_of)["mes"]).sum())
+    return {
+        "total_tickets": len(df_c),
+        "total_mes": total_mes,
+        "servicios_uniq": int(df_c["servicio"].nunique()) if "servicio" in df_c.columns else 0,
+        "clientes_uniq": int(df_c["cliente"].nunique()) if "cliente" in df_c.columns else 0,
+    }
+
+
+def calcular_reincidencias(df: pd.DataFrame, as_of: datetime) -> pd.DataFrame:
+    """Conteos por servicio en mes / 30d / trimestre y criterio de reincidencia."""
+    df_c = hasta_corte(df, as_of)
+    v = ventanas(as_of)
+
+    cnt_mes = df_c[df_c[DATE_COL] >= v["mes"]].groupby("servicio").size().rename("incidentes_mes")
+    cnt_30d = df_c[df_c[DATE_COL] >= v["30d"]].groupby("servicio").size().rename("incidentes_30d")
+    cnt_trim = df_c[df_c[DATE_COL] >= v["trimestre"]].groupby("servicio").size().rename("incidentes_trimestre")
+
+    stats = pd.concat([cnt_mes, cnt_30d, cnt_trim], axis=1).fillna(0).astype(int)
+    stats.index.name = "servicio"
+    stats = stats.reset_index()
+
+    # Criterio 1: >2 en último mes
+    crit1 = stats["incidentes_mes"] > UMBRAL_INCIDENTES
+    # Criterio 2: >2 en último trimestre Y al menos 1 en último mes
+    crit2 = (stats["incidentes_trimestre"] > UMBRAL_INCIDENTES) & (stats["incidentes_mes"] >= 1)
+
+    stats["reincidente"] = crit1 | crit2
+    stats["motivo"] = ""
+    stats.loc[crit1 & ~crit2, "motivo"] = "🔴 >2 incidentes en el mes"
+    stats.loc[~crit1 & crit2, "motivo"] = "🟠 >2 en trimestre + activo en mes"
+    stats.loc[crit1 & crit2, "motivo"] = "🔴 Ambos criterios"
+
+    if "cliente" in df_c.columns:
+        stats = stats.merge(_cliente_por_servicio(df_c), on="servicio", how="left")
+
+    return stats
+
+
+def estadisticas_fallas(df: pd.DataFrame, desde=None, hasta=None) -> pd.DataFrame:
+    """Distribución de tiempos entre fallas y de reparación por servicio, en horas.
+
+    Una sola ordenación por (servicio, fecha) y una sola agrupación: la brecha
+    de cada ticket es la diferencia con el ticket anterior del mismo servicio.
+    Devuelve una fila por servicio con ``n_fallas``, ``mtbf_h``, ``brecha_mediana_h``,
+    ``brecha_p90_h``, ``brecha_min_h`` y, si hay fechas de cierre, ``mttr_h`` y
+    ``mttr_mediana_h`` (creación → restablecimiento, o resuelto si falta).
+    Los servicios con una sola falla quedan con brechas NaN; los cierres
+    posteriores a ``hasta`` no cuentan para el MTTR.
+    """
+    base = df.dropna(subset=[DATE_COL, "servicio"])
+    if desde is not None:
+        base = base[base[DATE_COL] >= desde]
+    if hasta is not None:
+        base = base[base[DATE_COL] <= hasta]
+    base = base.sort_values(["servicio", DATE_COL], kind="stable")
+
+    srv = base["servicio"]
+    fechas = base[DATE_COL]
+    horas = pd.Timedelta(hours=1)
+    cols = {
+        "servicio": srv,
+        "brecha_h": fechas.diff().where(srv.eq(srv.shift())) / horas,
+    }
+    cierres = [c for c in ["fecha_restablecimiento", "fecha_resuelto"] if c in base.columns]
+    if cierres:
+        fin = base[cierres[0]]
+        for c in cierres[1:]:
+            fin = fin.fillna(base[c])
+        if hasta is not None:
+            # Un cierre posterior al corte todavía no se conocía ese día
+            fin = fin.where(fin <= hasta)
+        reparacion = (fin - fechas) / horas
+        cols["reparacion_h"] = reparacion.where(reparacion >= 0)
+
+    g = pd.DataFrame(cols).groupby("servicio", sort=False)
+    aggs = {
+        "n_fallas": ("brecha_h", "size"),
+        "mtbf_h": ("brecha_h", "mean"),
+        "brecha_mediana_h": ("brecha_h", "median"),
+        "brecha_min_h": ("brecha_h", "min"),
+    }
+    if cierres:
+        aggs["mttr_h"] = ("reparacion_h", "mean")
+        aggs["mttr_mediana_h"] = ("reparacion_h", "median")
+    stats = g.agg(**aggs)
+    stats.insert(3, "brecha_p90_h", g["brecha_h"].quantile(0.9))
+
+    if "cliente" in base.columns:
+        stats = stats.join(_cliente_por_servicio(base))
+    return stats.reset_index()
+
+
+def nivel_mtbf(mtbf_dias: pd.Series) -> np.ndarray:
+    """Semáforo de estabilidad según el MTBF en días."""
+    return np.select(
+        [mtbf_dias.isna(), mtbf_dias > 30, mtbf_dias >= 15, mtbf_dias >= 7],
+        ["⚪ Falla única", "🟢 Estable (>30d)", "🟡 Moderado (15-30d)", "🟠 Inestable (7-15d)"],
+        default="🔴 Crítico (<7d)",
+    )
+
+
+def calcular_mtbf(df: pd.DataFrame, as_of: datetime, dias=30) -> pd.DataFrame:
+    """Tabla MTBF / MTTR por servicio en los ``dias`` previos al corte (None = todo el histórico)."""
+    desde = as_of - timedelta(days=dias) if dias else None
+    stats = estadisticas_fallas(df, desde=desde, hasta=as_of)
+
+    tabla = pd.DataFrame({
+        "Servicio": stats["servicio"],
+        "Cliente": stats["cliente"] if "cliente" in stats.columns else "-",
+        "MTBF (días)": (stats["mtbf_h"] / 24).round(1),
+        "Brecha Mediana (h)": stats["brecha_mediana_h"].round(1),
+        "Brecha P90 (h)": stats["brecha_p90_h"].round(1),
+        "Brecha Mín. (h)": stats["brecha_min_h"].round(1),
+        "# Fallas": stats["n_fallas"],
+    })
+    if "mttr_h" in stats.columns:
+        tabla["MTTR (h)"] = stats["mttr_h"].round(1)
+        tabla["MTTR Mediana (h)"] = stats["mttr_mediana_h"].round(1)
+    tabla["Nivel"] = nivel_mtbf(tabla["MTBF (días)"])
+    return tabla.sort_values(["MTBF (días)", "# Fallas"], ascending=[True, False], na_position="last")
+
+
+def downtime_permitido(meses: pd.PeriodIndex, sla_objetivo: float = SLA_OBJETIVO) -> np.ndarray:
+    """Minutos de caída permitidos en cada mes calendario según su duración real."""
+    return np.asarray(meses.days_in_month) * 24 * 60 * (1 - sla_objetivo / 100)
+
+
+def calcular_sla_mensual(df: pd.DataFrame, sla_objetivo: float = SLA_OBJETIVO) -> pd.DataFrame:
+    """Downtime y consumo de SLA por (servicio, mes calendario) en una sola agrupación.
+
+    Sirve tanto para el mes en curso como para reportar meses arbitrarios en
+    bloque: basta con recortar ``df`` al rango deseado antes de llamar.
+    """
+    base = df.dropna(subset=[DATE_COL])
+    mes = base[DATE_COL].dt.to_period("M").rename("mes")
+    conteo = ("ticket_id", "count") if "ticket_id" in base.columns else ("servicio", "count")
+    sla = base.groupby(["servicio", mes]).agg(
+        downtime_acum=("tiempo_ufinet_min", "sum"),
+        n_tickets=conteo,
+    ).reset_index()
+
+    if "cliente" in base.columns:
+        sla = sla.merge(_cliente_por_servicio(base), on="servicio", how="left")
+
+    sla["downtime_permitido"] = downtime_permitido(pd.PeriodIndex(sla["mes"]), sla_objetivo).round(1)
+    sla["consumo_sla"] = (sla["downtime_acum"] / sla["downtime_permitido"] * 100).round(1).clip(0, 100)
+    sla["nivel_sla"] = np.select(
+        [sla["consumo_sla"] < 60, sla["consumo_sla"] < 80, sla["consumo_sla"] < 95],
+        ["🟢 Seguro", "🟡 Atención", "🟠 Riesgo"],
+        default="🔴 Crítico",
+    )
+    return sla.sort_values(["mes", "consumo_sla"], ascending=[True, False])
+
+
+def calcular_disponibilidad(df: pd.DataFrame, as_of: datetime, sla_objetivo: float = SLA_OBJETIVO) -> pd.DataFrame:
+    """Consumo de SLA por servicio en el mes de la fecha de corte."""
+    df_c = hasta_corte(df, as_of)
+    df_mes = df_c[df_c[DATE_COL] >= ventanas(as_of)["mes"]]
+    return calcular_sla_mensual(df_mes, sla_objetivo)
+
+
+def calcular_alertas(df: pd.DataFrame, as_of: datetime) -> pd.DataFrame:
+    """Servicios con >2 incidentes en el mes de la fecha de corte."""
+    df_c = hasta_corte(df, as_of)
+    df_mes = df_c[df_c[DATE_COL] >= ventanas(as_of)["mes"]]
+    cnt_alert = df_mes.groupby("servicio").size().reset_index(name="incidentes_mes")
+    if "cliente" in df_c.columns:
+        cnt_alert = cnt_alert.merge(_cliente_por_servicio(df_c), on="servicio", how="left")
+
+    alertas = cnt_alert[cnt_alert["incidentes_mes"] > UMBRAL_INCIDENTES]
+    return alertas.sort_values("incidentes_mes", ascending=False)
+
+
+# ─────────────────────────────────────────────
+# BACKFILL
+# ─────────────────────────────────────────────
+def _cliente_al_corte(df: pd.DataFrame, pares: pd.DataFrame) -> np.ndarray:
+    """Cliente de cada (fecha_corte, servicio) tal como lo vería ``_cliente_por_servicio(hasta_corte(...))``.
+
+    Ese cliente es el del primer ticket (en orden de filas) con cliente no nulo
+    creado hasta el corte. Se calcula con un mínimo acumulado de la posición
+    de fila en orden cronológico y un ``merge_asof`` por servicio.
+    """
+    filas = df[[DATE_COL, "servicio", "cliente"]].reset_index(drop=True)
+    filas["pos"] = np.arange(len(filas))
+    filas = filas.dropna(subset=[DATE_COL, "cliente"])
+    filas = filas[filas["servicio"].isin(pares["servicio"].unique())]
+    filas = filas.sort_values(DATE_COL, kind="stable")
+    filas["pos"] = filas.groupby("servicio")["pos"].cummin()
+
+    izq = pares[["fecha_corte", "servicio"]].copy()
+    izq["orden"] = np.arange(len(izq))
+    # merge_asof exige la misma resolución en ambas claves ([s]/[us] de date_range vs [ns] de parse_fechas)
+    corte = izq["fecha_corte"] + pd.to_timedelta(FIN_DE_DIA.isoformat())
+    izq["corte"] = corte.astype(filas[DATE_COL].dtype)
+    izq = izq.sort_values("corte", kind="stable")
+    unido = pd.merge_asof(
+        izq, filas[[DATE_COL, "servicio", "pos"]],
+        left_on="corte", right_on=DATE_COL, by="servicio", direction="backward",
+    ).sort_values("orden")
+
+    clientes = df["cliente"].to_numpy()
+    pos = unido["pos"].to_numpy()
+    return np.where(pd.isna(pos), None, clientes[np.nan_to_num(pos, nan=0).astype(np.int64)])
+
+
+def backfill_alertas(df: pd.DataFrame, desde: date, hasta: date) -> pd.DataFrame:
+    """Snapshot diario de alertas para cada fecha de corte entre ``desde`` y ``hasta``.
+
+    Equivale a llamar ``calcular_alertas(df, fecha_corte(d))`` para cada día,
+    pero en una sola pasada: se cuentan incidentes por (día, servicio) y se
+    acumulan dentro de cada mes calendario. Solo entran en la matriz los
+    servicios que superan el umbral en algún mes, así que el tamaño queda
+    acotado por las alertas reales y no por el catálogo completo.
+    """
+    fechas = pd.date_range(desde, hasta, freq="D")
+    columnas = ["fecha_corte", "servicio", "incidentes_mes"]
+    if "cliente" in df.columns:
+        columnas.insert(1, "cliente")
+    if len(fechas) == 0:
+        return pd.DataFrame(columns=columnas)
+
+    dias = pd.date_range(fechas[0].replace(day=1), fechas[-1], freq="D")
+    base = df.dropna(subset=[DATE_COL, "servicio"])
+    dia = base[DATE_COL].dt.normalize()
+    en_rango = (dia >= dias[0]) & (dia <= dias[-1])
+    base, dia = base[en_rango], dia[en_rango]
+
+    mensual = base.groupby(["servicio", dia.dt.to_period("M")]).size()
+    candidatos = mensual[mensual > UMBRAL_INCIDENTES].index.get_level_values(0).unique()
+    sel = base["servicio"].isin(candidatos)
+    if not sel.any():
+        return pd.DataFrame(columns=columnas)
+
+    diario = (
+        base[sel].groupby([dia[sel], "servicio"]).size()
+        .unstack(fill_value=0)
+        .reindex(dias, fill_value=0)
+    )
+    acumulado = diario.groupby(diario.index.to_period("M")).cumsum().loc[fechas]
+
+    largo = acumulado.stack()
+    largo = largo[largo > UMBRAL_INCIDENTES].rename("incidentes_mes")
+    largo.index.names = ["fecha_corte", "servicio"]
+    out = largo.reset_index()
+
+    if "cliente" in df.columns:
+        out["cliente"] = _cliente_al_corte(df, out)
+
+    out = out.sort_values(["fecha_corte", "incidentes_mes"], ascending=[True, False])
+    return out[columnas].reset_index(drop=True)
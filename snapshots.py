@@ -0,0 +1,97 @@
+"""Snapshots de reportes ya calculados para el visor de solo lectura.
+
+Cada snapshot es un directorio versionado con una tabla Parquet por reporte
+(reincidencias, mtbf, disponibilidad, alertas) y un ``manifest.json`` con los
+KPIs y los metadatos del cálculo. El visor (``streamlit run app.py -- --visor``)
+abre el último sin tocar Google Sheets ni el DataFrame de tickets.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+
+DIRECTORIO_SNAPSHOTS = os.environ.get("UFINET_SNAPSHOT_DIR", "snapshots")
+MAX_SNAPSHOTS = 30  # se conservan los más recientes
+TMP_HUERFANO_SEG = 3600  # un .tmp más viejo que esto quedó de una escritura interrumpida
+FORMATO = 1
+TABLAS = ["reincidencias", "mtbf", "disponibilidad", "alertas"]
+
+
+def guardar_snapshot(tablas: dict, kpis: dict, meta: dict, directorio: str = DIRECTORIO_SNAPSHOTS) -> str:
+    """Escribe un snapshot y devuelve su ruta.
+
+    Se escribe en un directorio temporal y se renombra al final, así el visor
+    nunca ve un snapshot a medio escribir.
+    """
+    creado = datetime.now()
+    # Microsegundos + sufijo aleatorio: dos publicaciones simultáneas no chocan
+    nombre = f"{creado:%Y%m%dT%H%M%S%f}_corte{meta['as_of']:%Y%m%d}_{uuid.uuid4().hex[:8]}"
+    destino = os.path.join(directorio, nombre)
+    os.makedirs(directorio, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{nombre}_", suffix=".tmp", dir=directorio)
+
+    try:
+        for nombre_tabla, tabla in tablas.items():
+            periodos = {c: str for c in tabla.columns if isinstance(tabla[c].dtype, pd.PeriodDtype)}
+            tabla.astype(periodos).to_parquet(os.path.join(tmp, f"{nombre_tabla}.parquet"), index=False)
+
+        manifest = {
+            "formato": FORMATO,
+            "creado": creado.isoformat(timespec="seconds"),
+            "tablas": list(tablas),
+            "kpis": kpis,
+            **meta,
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp, destino)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    _purgar(directorio)
+    return destino
+
+
+def listar_snapshots(directorio: str = DIRECTORIO_SNAPSHOTS) -> list:
+    """Rutas de los snapshots completos, del más reciente al más antiguo."""
+    if not os.path.isdir(directorio):
+        return []
+    nombres = [
+        n for n in os.listdir(directorio)
+        if not n.endswith(".tmp") and os.path.isfile(os.path.join(directorio, n, "manifest.json"))
+    ]
+    return [os.path.join(directorio, n) for n in sorted(nombres, reverse=True)]
+
+
+def ultimo_snapshot(directorio: str = DIRECTORIO_SNAPSHOTS):
+    snaps = listar_snapshots(directorio)
+    return snaps[0] if snaps else None
+
+
+def cargar_snapshot(ruta: str):
+    """Devuelve ``(manifest, {nombre: DataFrame})``."""
+    with open(os.path.join(ruta, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    tablas = {
+        nombre: pd.read_parquet(os.path.join(ruta, f"{nombre}.parquet"))
+        for nombre in manifest["tablas"]
+    }
+    return manifest, tablas
+
+
+def _purgar(directorio: str):
+    for ruta in listar_snapshots(directorio)[MAX_SNAPSHOTS:]:
+        shutil.rmtree(ruta, ignore_errors=True)
+
+    # Temporales huérfanos de escrituras interrumpidas (los recientes pueden estar en curso)
+    limite = time.time() - TMP_HUERFANO_SEG
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if nombre.endswith(".tmp") and os.path.isdir(ruta) and os.path.getmtime(ruta) < limite:
+            shutil.rmtree(ruta, ignore_errors=True)
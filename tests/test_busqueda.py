@@ -0,0 +1,11 @@
+import pandas as pd
+
+import busqueda
+
+
+def test_cliente_nulo_no_se_indexa_como_texto():
+    df = pd.DataFrame({"servicio": ["SRV-1", "SRV-2"], "cliente": ["Telefónica", None]})
+    indice = busqueda.IndiceBusqueda(df)
+    assert indice.buscar("nan").empty
+    assert indice.buscar("telefonica").index.tolist() == ["SRV-1"]
+    assert indice.buscar("srv-2").index.tolist() == ["SRV-2"]
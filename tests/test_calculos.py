@@ -0,0 +1,103 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import calculos
+
+
+def test_parse_fechas_iso_no_invierte_dia_y_mes():
+    serie = pd.Series(["2026-02-01T10:00:00", "2026-02-03T11:30:00.123"])
+    fechas, n_nat = calculos.parse_fechas(serie)
+    assert fechas.tolist() == [
+        pd.Timestamp("2026-02-01 10:00:00"),
+        pd.Timestamp("2026-02-03 11:30:00.123"),
+    ]
+    assert n_nat == 0
+
+
+def test_parse_fechas_timestamps_con_fraccion_en_columna_object():
+    serie = pd.Series([pd.Timestamp("2026-02-01 10:00:00.5"), "03/02/2026 08:00:00"], dtype=object)
+    fechas, _ = calculos.parse_fechas(serie)
+    assert fechas.tolist() == [pd.Timestamp("2026-02-01 10:00:00.5"), pd.Timestamp("2026-02-03 08:00:00")]
+
+
+def test_parse_fechas_con_offset_se_normaliza_a_utc():
+    serie = pd.Series(["2026-02-01T10:00:00Z", "2026-02-01T10:00:00-03:00", "01/02/2026 10:00:00"])
+    fechas, n_nat = calculos.parse_fechas(serie)
+    assert fechas.dt.tz is None
+    assert fechas.tolist() == [
+        pd.Timestamp("2026-02-01 10:00:00"),
+        pd.Timestamp("2026-02-01 13:00:00"),
+        pd.Timestamp("2026-02-01 10:00:00"),
+    ]
+    assert n_nat == 0
+
+
+def test_parse_fechas_cuenta_coercionados_sin_contar_vacios():
+    serie = pd.Series(["01/02/2026 10:00:00", "basura", "", None])
+    fechas, n_nat = calculos.parse_fechas(serie)
+    assert fechas.isna().tolist() == [False, True, True, True]
+    assert n_nat == 1
+
+
+def test_fecha_corte_incluye_todo_el_dia():
+    assert calculos.fecha_corte(datetime(2026, 3, 31).date()) == datetime(2026, 3, 31, 23, 59, 59)
+
+
+def test_validar_df_acota_downtime_sin_modificar_el_original():
+    df = pd.DataFrame({
+        "ticket_id": ["T1", "T2", "T3"],
+        "fecha_creacion": pd.to_datetime(["2026-01-01", "2026-01-02", "2026-01-03"]),
+        "tiempo_ufinet_min": [-5.0, 30.0, 99999.0],
+    })
+    limpio = calculos.validar_df(df)
+    assert limpio["tiempo_ufinet_min"].tolist() == [0.0, 30.0, calculos.MINUTOS_MES_MAX]
+    assert limpio.attrs["validacion"]["downtime_fuera_rango"] == 2
+    assert df["tiempo_ufinet_min"].tolist() == [-5.0, 30.0, 99999.0]
+    assert "validacion" not in df.attrs
+
+
+def test_mttr_ignora_cierres_posteriores_al_corte():
+    df = pd.DataFrame({
+        "servicio": ["A", "A"],
+        "fecha_creacion": pd.to_datetime(["2026-01-10 08:00", "2026-01-20 08:00"]),
+        "fecha_restablecimiento": pd.to_datetime(["2026-01-10 10:00", "2026-01-25 08:00"]),
+    })
+    stats = calculos.estadisticas_fallas(df, hasta=datetime(2026, 1, 21))
+    assert stats["mttr_h"].tolist() == [2.0]
+    assert stats["n_fallas"].tolist() == [2]
+
+
+def _tickets_aleatorios(n=1500):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        "servicio": rng.choice([f"S{i}" for i in range(20)], n),
+        "cliente": rng.choice(["A", "B", "C", None], n),
+        "fecha_creacion": pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 60 * 1440, n), unit="min"),
+    })
+
+
+@pytest.mark.parametrize("desde_texto", [False, True])
+def test_backfill_equivale_a_calcular_alertas_por_dia(desde_texto):
+    df = _tickets_aleatorios()
+    if desde_texto:
+        # Como llega de Google Sheets: fechas en texto que pasan por parse_fechas
+        df["fecha_creacion"] = df["fecha_creacion"].dt.strftime("%d/%m/%Y %H:%M:%S")
+        df = calculos.standardize_df(df)
+    backfill = calculos.backfill_alertas(df, date(2026, 1, 1), date(2026, 2, 28))
+    for dia in pd.date_range("2026-01-01", "2026-02-28"):
+        alertas = calculos.calcular_alertas(df, calculos.fecha_corte(dia.date()))
+        del_dia = backfill[backfill["fecha_corte"] == dia]
+        esperado = sorted(zip(alertas["servicio"], alertas["incidentes_mes"], alertas["cliente"].fillna("-")))
+        obtenido = sorted(zip(del_dia["servicio"], del_dia["incidentes_mes"], del_dia["cliente"].fillna("-")))
+        assert obtenido == esperado, dia
+
+
+def test_version_dataset_distingue_orden_y_encabezados():
+    df = pd.DataFrame({"servicio": ["S1", "S1"], "cliente": ["A", "B"]})
+    version = calculos.version_dataset(df)
+    assert calculos.version_dataset(df.copy()) == version
+    assert calculos.version_dataset(df.iloc[::-1]) != version
+    assert calculos.version_dataset(df.rename(columns={"cliente": "cliente_final"})) != version
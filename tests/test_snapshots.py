@@ -0,0 +1,23 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+
+import snapshots
+
+
+def test_publicaciones_en_el_mismo_segundo_no_chocan(tmp_path):
+    tablas = {"alertas": pd.DataFrame({"servicio": ["A"], "incidentes_mes": [3]})}
+    meta = {"as_of": datetime(2026, 1, 31, 23, 59, 59)}
+    rutas = {snapshots.guardar_snapshot(tablas, {"total_tickets": 1}, meta, str(tmp_path)) for _ in range(3)}
+    assert len(rutas) == 3
+    assert snapshots.ultimo_snapshot(str(tmp_path)) == max(rutas)
+
+
+def test_purga_temporales_huerfanos(tmp_path):
+    huerfano = tmp_path / ".viejo.tmp"
+    huerfano.mkdir()
+    os.utime(huerfano, (0, 0))
+    snapshots.guardar_snapshot({"alertas": pd.DataFrame({"a": [1]})}, {}, {"as_of": datetime(2026, 1, 1)}, str(tmp_path))
+    assert not huerfano.exists()
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]